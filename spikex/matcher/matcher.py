@@ -1,9 +1,26 @@
+import json
+from bisect import bisect_left
 from typing import Union
+from weakref import WeakKeyDictionary
 
 import regex as re
-from spacy.attrs import DEP, LEMMA, POS, TAG, intify_attr
+from spacy.attrs import (
+    DEP,
+    ENT_TYPE,
+    LEMMA,
+    LOWER,
+    ORTH,
+    POS,
+    PREFIX,
+    SENT_START,
+    SHAPE,
+    SPACY,
+    SUFFIX,
+    TAG,
+    intify_attr,
+)
 from spacy.errors import Errors, MatchPatternError
-from spacy.tokens import Doc, Span, Token
+from spacy.tokens import Doc, Span
 
 from ..defaults import spacy_version
 
@@ -16,7 +33,8 @@ else:
     from spacy.attrs import MORPH  # type: ignore
     from spacy.schemas import validate_token_pattern  # type: ignore
 
-from functools import partial
+from functools import lru_cache, partial
+from operator import attrgetter
 
 from ._schemas import TOKEN_PATTERN_SCHEMA
 
@@ -24,6 +42,16 @@ __all__ = ["Matcher"]
 
 DocLike = Union[Doc, Span]
 
+# legacy between spaCy versions
+_ATTR2PIPE = {
+    TAG: ("tagger", "is_tagged"),
+    POS: ("morphologizer", "is_tagged"),
+    LEMMA: ("lemmatizer", "is_tagged"),
+    DEP: ("parser", "is_parsed"),
+}
+if spacy_version >= 3:
+    _ATTR2PIPE[MORPH] = ("morphologizer", None)
+
 
 class Matcher(object):
     def __init__(self, vocab, validate=False):
@@ -31,7 +59,10 @@ class Matcher(object):
         self._specs = {}
         self._patterns = {}
         self._callbacks = {}
+        self._active_callbacks = {}
         self._seen_attrs = set()
+        self._annotation_checks = ()
+        self._attrs_maps_cache = WeakKeyDictionary()
         self.vocab = vocab
         self.validate = validate
 
@@ -43,6 +74,16 @@ class Matcher(object):
         except NameError:
             self._validator = validate_token_pattern
 
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # cached maps belong to live docs
+        del state["_attrs_maps_cache"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._attrs_maps_cache = WeakKeyDictionary()
+
     def __len__(self):
         """
         Get the number of rules added to the matcher.
@@ -164,10 +205,19 @@ class Matcher(object):
             self._specs[key].append(patternspec)
             for token in pattern:
                 for attr in token:
-                    iattr = intify_attr(attr)
-                    self._seen_attrs.add(iattr)
+                    self._seen_attrs.add(_intify_attr(attr))
+        # annotations required by the attributes seen so far
+        self._annotation_checks = tuple(
+            (attr, pipe, flag)
+            for attr, (pipe, flag) in _ATTR2PIPE.items()
+            if attr in self._seen_attrs
+        )
         self._patterns.setdefault(key, [])
         self._callbacks[key] = on_match
+        if on_match is not None:
+            self._active_callbacks[key] = on_match
+        else:
+            self._active_callbacks.pop(key, None)
         self._patterns[key].extend(patterns)
 
     def remove(self, key: str):
@@ -186,6 +236,7 @@ class Matcher(object):
         self._specs.pop(key)
         self._patterns.pop(key)
         self._callbacks.pop(key)
+        self._active_callbacks.pop(key, None)
 
     def __call__(self, doclike: DocLike, allow_missing=False):
         """
@@ -204,20 +255,9 @@ class Matcher(object):
             `doc[start:end]`.
         """
         if not allow_missing:
-            # legacy between spaCy versions
-            attr2pipe = {
-                TAG: ("tagger", "is_tagged"),
-                POS: ("morphologizer", "is_tagged"),
-                LEMMA: ("lemmatizer", "is_tagged"),
-                DEP: ("parser", "is_parsed"),
-            }
-            if spacy_version >= 3:
-                attr2pipe[MORPH] = ("morphologizer", None)
-            for attr, (pipe, flag) in attr2pipe.items():
-                if (
-                    attr not in self._seen_attrs
-                    or (spacy_version >= 3 and doclike.has_annotation(attr))
-                    or (spacy_version < 3 and getattr(doclike, flag))
+            for attr, pipe, flag in self._annotation_checks:
+                if (spacy_version >= 3 and doclike.has_annotation(attr)) or (
+                    spacy_version < 3 and getattr(doclike, flag)
                 ):
                     continue
                 raise ValueError(
@@ -225,117 +265,303 @@ class Matcher(object):
                         pipe=pipe, attr=self.vocab.strings.as_string(attr)
                     )
                 )
-        matches = []
-        seen = set()
-        for match in _find_matches(doclike, self._specs):
-            if match in seen:
-                continue
-            seen.add(match)
-            matches.append(match)
-        for i, match in enumerate(matches):
-            on_match = self._callbacks.get(match[0], None)
-            if on_match is not None:
-                on_match(self, doclike, i, matches)
+        attrs_maps = {}
+        doc_cache = None
+        if isinstance(doclike, Doc):
+            doc_cache = self._attrs_maps_cache.setdefault(doclike, {})
+            # reuse maps only if their attribute values are unchanged
+            for attr, (fingerprint, maps) in doc_cache.items():
+                if fingerprint == _attr_fingerprint(doclike, attr):
+                    attrs_maps[attr] = maps
+        # dict keys dedupe matches preserving their order
+        matches = list(
+            dict.fromkeys(_find_matches(doclike, self._specs, attrs_maps))
+        )
+        if doc_cache is not None:
+            for attr, maps in attrs_maps.items():
+                if attr in doc_cache and doc_cache[attr][1] is maps:
+                    continue
+                fingerprint = _attr_fingerprint(doclike, attr)
+                if fingerprint is None:
+                    continue
+                doc_cache[attr] = (fingerprint, maps)
+        callbacks = self._active_callbacks
+        if callbacks:
+            for i, match in enumerate(matches):
+                on_match = callbacks.get(match[0])
+                if on_match is not None:
+                    on_match(self, doclike, i, matches)
         return matches
 
+    def pipe(
+        self, docs, return_matches=False, as_tuples=False, allow_missing=False
+    ):
+        """
+        Match a stream of documents, yielding them in turn.
+
+        Parameters
+        ----------
+        docs: iterable
+            A stream of documents, or `(doc, context)` tuples
+            if `as_tuples` is `True`.
+        return_matches: bool
+            Yield the match lists along with the docs, making
+            results `(doc, matches)` tuples.
+        as_tuples: bool
+            Interpret the input stream as `(doc, context)` tuples,
+            and yield `(result, context)` tuples out.
+        allow_missing: bool
+            Whether to skip the check on missing annotations.
+
+        Yields
+        ------
+        Doc
+            Documents, in order.
+        """
+        for item in docs:
+            doc, context = item if as_tuples else (item, None)
+            matches = self(doc, allow_missing=allow_missing)
+            result = (doc, matches) if return_matches else doc
+            yield (result, context) if as_tuples else result
+
     def _normalize_key(self, key):
         if isinstance(key, int):
             return key
-        return (
-            self.vocab.strings.add(key)
-            if key not in self.vocab.strings
-            else self.vocab.strings[key]
-        )
+        # adding an existing string just returns its hash
+        return self.vocab.strings.add(key)
 
 
-def _find_matches(tokens, specs):
-    attrs_maps_cache = {}
-    num_tokens = len(tokens)
+def _find_matches(tokens, specs, attrs_maps_cache):
+    scans_cache = {}
+    literals_cache = {}
     for key, pattern_specs in specs.items():
-        for pattern_spec, anchor_gs in pattern_specs:
-            candidates = [((0, num_tokens), {})]
-            for attr, (xp, is_ext) in pattern_spec.items():
-                if attr not in attrs_maps_cache:
-                    attrs_maps_cache[attr] = _attr_maps(attr, tokens, is_ext)
-                i2idx, idx2i, text = attrs_maps_cache[attr]
-                maxlen = len(text)
-                new_candidates = []
-                for candidate, anchor_ss in candidates:
-                    start_idx = i2idx[candidate[0]]
-                    end_idx = i2idx[candidate[1]]
-                    curr_text = text[start_idx:end_idx]
-                    for match in xp.finditer(curr_text, overlapped=True):
-                        span = (
-                            start_idx + match.span()[0],
-                            start_idx + match.span()[1],
-                        )
-                        start, end = _span_idx2i(span, idx2i, maxlen)
-                        new_ss = {}
-                        for i in range(len(match.groups())):
-                            group_i = i + 1
-                            if group_i not in anchor_gs:
-                                continue
-                            span_g = match.span(group_i)
-                            span = (
-                                start_idx + span_g[0],
-                                start_idx + span_g[1],
-                            )
-                            new_ss[group_i] = _span_idx2i(span, idx2i, maxlen)
-                        if anchor_ss:
-                            should_stop = False
-                            for group_i, span in new_ss.items():
-                                if anchor_ss[group_i] != span:
-                                    should_stop = True
-                                    break
-                            if should_stop:
-                                continue
-                        new_candidates.append(((start, end), new_ss))
-                candidates = new_candidates
-            matches = [c[0] for c in candidates]
+        for pattern_spec, anchor_gs, literal_spec in pattern_specs:
+            matches = None
+            if literal_spec is not None:
+                matches = _match_literal(
+                    tokens, literal_spec, attrs_maps_cache, literals_cache
+                )
+            if matches is None:
+                matches = _match_pattern(
+                    tokens,
+                    pattern_spec,
+                    anchor_gs,
+                    attrs_maps_cache,
+                    scans_cache,
+                )
             yield from (
                 (key, *match) for match in _filter_out_submatches(matches)
             )
 
 
+def _match_pattern(
+    tokens, pattern_spec, anchor_gs, attrs_maps_cache, scans_cache
+):
+    num_tokens = len(tokens)
+    candidates = [((0, num_tokens), {})]
+    for attr, (xp, is_ext) in pattern_spec:
+        attr_key = (attr, is_ext)
+        if attr_key not in attrs_maps_cache:
+            attrs_maps_cache[attr_key] = _attr_maps(attr, tokens, is_ext)
+        attr_maps = attrs_maps_cache[attr_key]
+        new_candidates = []
+        for candidate, anchor_ss in candidates:
+            # Whole text scans are shared between
+            # patterns which compile to the same regex
+            if candidate == (0, num_tokens):
+                scan_key = (attr_key, xp.pattern, xp.flags, anchor_gs)
+                if scan_key not in scans_cache:
+                    scans_cache[scan_key] = _scan_candidate(
+                        xp, attr_maps, candidate, anchor_gs
+                    )
+                hits = scans_cache[scan_key]
+            else:
+                hits = _scan_candidate(xp, attr_maps, candidate, anchor_gs)
+            for span, new_ss in hits:
+                if anchor_ss:
+                    should_stop = False
+                    for group_i, span_g in new_ss.items():
+                        if anchor_ss[group_i] != span_g:
+                            should_stop = True
+                            break
+                    if should_stop:
+                        continue
+                new_candidates.append((span, new_ss))
+        candidates = new_candidates
+        if not candidates:
+            break
+    return [c[0] for c in candidates]
+
+
+def _match_literal(tokens, literal_spec, attrs_maps_cache, literals_cache):
+    found = None
+    for attr, value in literal_spec:
+        attr_key = (attr, False)
+        if attr_key not in literals_cache:
+            if attr_key not in attrs_maps_cache:
+                attrs_maps_cache[attr_key] = _attr_maps(attr, tokens, False)
+            literals_cache[attr_key] = _literal_index(
+                attr, attrs_maps_cache[attr_key], len(tokens)
+            )
+        index = literals_cache[attr_key]
+        # values can't be told apart by equality,
+        # fall back on regexes
+        if index is None:
+            return
+        found = (
+            set(index.get(value, ()))
+            if found is None
+            else found.intersection(index.get(value, ()))
+        )
+        if not found:
+            return []
+    return [(i, i + 1) for i in sorted(found)]
+
+
+def _literal_index(attr, attr_maps, num_tokens):
+    _, text = attr_maps
+    if not num_tokens:
+        return {}
+    values = text.split(" ")
+    if len(values) != num_tokens or _XP_INNER_WHITESPACE.search(text):
+        return
+    if attr in _CASELESS_ATTRS and not text.isascii():
+        # the only non-ASCII lowercase char matching
+        # an ASCII one when ignoring case is `ſ`
+        values = [v.replace("\u017f", "s") for v in values]
+    index = {}
+    for i, value in enumerate(values):
+        index.setdefault(value, []).append(i)
+    return index
+
+
+def _scan_candidate(xp, attr_maps, candidate, anchor_gs):
+    i2idx, text = attr_maps
+    start_idx = i2idx[candidate[0]]
+    end_idx = i2idx[candidate[1]]
+    # slicing instead of passing `pos` and `endpos` keeps `^`
+    # matching at the candidate start; a whole text slice is
+    # not copied at all
+    curr_text = text[start_idx:end_idx]
+    hits = []
+    for match in xp.finditer(curr_text, overlapped=True):
+        match_start, match_end = match.span()
+        span = (start_idx + match_start, start_idx + match_end)
+        start, end = _span_idx2i(span, i2idx)
+        new_ss = {}
+        for group_i in anchor_gs:
+            span_g = match.span(group_i)
+            span = (
+                start_idx + span_g[0],
+                start_idx + span_g[1],
+            )
+            new_ss[group_i] = _span_idx2i(span, i2idx)
+        hits.append(((start, end), new_ss))
+    return hits
+
+
 def _attr_maps(attr, tokens, is_extension):
-    i2idx = {}
-    idx2i = {}
-    text_tokens = []
-    curr_length = 0
-    num_spaces = 0
     regex_attr = attr == "REGEX"
-    for i, token in enumerate(tokens):
-        pad = i if not regex_attr else num_spaces
-        idx = curr_length + pad
-        i2idx[i] = idx
-        idx2i[idx] = i
+    # token start offsets, sorted by construction
+    # so that they can be bisected back to tokens
+    if regex_attr and not is_extension:
+        # regexes run on the original text
+        base_idx = tokens[0].idx if len(tokens) else 0
+        i2idx = [token.idx - base_idx for token in tokens]
+        text = tokens.text_with_ws
+        i2idx.append(len(text))
+        return (i2idx, text)
+    sep = "" if regex_attr else " "
+    text_tokens = None
+    if not is_extension and isinstance(tokens, Doc):
+        text_tokens = _attr_values_from_array(attr, tokens)
+    if text_tokens is None:
         if is_extension:
-            value = token._.get(attr)
-        else:
-            value = _get_token_attr(token, attr)
-        value = str(value)
-        curr_length += len(value)
-        if regex_attr:
-            value += token.whitespace_
-            num_spaces += len(token.whitespace_)
+
+            def get_value(token):
+                return token._.get(attr)
+
         else:
-            num_spaces = i
-        text_tokens.append(value)
-    curr_length += num_spaces
-    i2idx[len(tokens)] = curr_length
-    idx2i[curr_length] = len(tokens)
-    text = ("" if regex_attr else " ").join(text_tokens)
-    return (i2idx, idx2i, text)
+            get_value = _get_token_attr_getter(attr)
+        text_tokens = []
+        for token in tokens:
+            value = str(get_value(token))
+            if regex_attr:
+                value += token.whitespace_
+            text_tokens.append(value)
+    i2idx = []
+    curr_length = 0
+    for value in text_tokens:
+        i2idx.append(curr_length)
+        curr_length += len(value) + len(sep)
+    text = sep.join(text_tokens)
+    i2idx.append(len(text))
+    return (i2idx, text)
+
+
+def _attr_values_from_array(attr, doc):
+    if attr not in _ARRAY_ATTRS:
+        return
+    attr_id, lower = _ARRAY_ATTRS[attr]
+    strings = doc.vocab.strings
+    # each distinct hash is resolved once
+    lookup = {}
+    values = []
+    for value_id in doc.to_array([attr_id]).ravel().tolist():
+        if value_id not in lookup:
+            value = strings[value_id]
+            lookup[value_id] = value.lower() if lower else value
+        values.append(lookup[value_id])
+    return values
+
+
+# String attributes read in bulk as hashes with `Doc.to_array`,
+# with whether their values are lowercased as by their getters
+_ARRAY_ATTRS = {
+    "ORTH": (ORTH, False),
+    "TEXT": (ORTH, False),
+    "LOWER": (LOWER, False),
+    "LENGTH": (LOWER, False),
+    "TAG": (TAG, False),
+    "DEP": (DEP, False),
+    "ENT_TYPE": (ENT_TYPE, False),
+    "SHAPE": (SHAPE, False),
+    "PREFIX": (PREFIX, False),
+    "SUFFIX": (SUFFIX, False),
+}
+if spacy_version >= 3:
+    # spaCy 2 looks up missing lemmas on the fly
+    _ARRAY_ATTRS["LEMMA"] = (LEMMA, True)
+
+
+# Array attributes whose values back the maps
+# of attributes not supported by `Doc.to_array`
+_FINGERPRINT_ATTRS = {
+    "TEXT": ORTH,
+    "REGEX": ORTH,
+    "LENGTH": LOWER,
+    "IS_SENT_START": SENT_START,
+}
+
+
+def _attr_fingerprint(doc, attr_key):
+    attr, is_extension = attr_key
+    # extension values can't be tracked
+    if is_extension:
+        return
+    attr_id = _FINGERPRINT_ATTRS.get(attr) or _intify_attr(attr)
+    if attr_id is None:
+        return
+    return doc.to_array([ORTH, SPACY, attr_id]).tobytes()
 
 
-def _span_idx2i(span_idx, idx2i, maxlen):
-    start = span_idx[0]
-    while start not in idx2i and start < maxlen:
-        start += 1
-    end = span_idx[1]
-    while end not in idx2i and end < maxlen:
-        end += 1
-    return idx2i[start], idx2i[end]
+def _span_idx2i(span_idx, i2idx):
+    # snap offsets forward to the nearest token start,
+    # whose position in `i2idx` is the token index
+    return (
+        bisect_left(i2idx, span_idx[0]),
+        bisect_left(i2idx, span_idx[1]),
+    )
 
 
 def _filter_out_submatches(matches):
@@ -354,12 +580,25 @@ def _filter_out_submatches(matches):
 
 
 def _preprocess_pattern(pattern):
-    pattern_spec = {}
-    num_tokens = len(pattern)
+    _normalize_pattern(pattern)
+    try:
+        pattern_key = json.dumps(pattern)
+    except TypeError:
+        return _build_pattern_spec(pattern)
+    return _pattern_spec_from_key(pattern_key)
+
+
+def _normalize_pattern(pattern):
     for tokens_spec in pattern:
         if not isinstance(tokens_spec, dict):
             raise ValueError(Errors.E154.format())
-        for attr, value in {**tokens_spec}.items():
+        # normalize attributes, keeping their order
+        # as it drives how the pattern spec is built
+        if any(a.islower() or a == "SENT_START" for a in tokens_spec):
+            items = list(tokens_spec.items())
+            tokens_spec.clear()
+            tokens_spec.update((_normalize_attr(a), v) for a, v in items)
+        for attr, value in tokens_spec.items():
             if not (
                 isinstance(value, str)
                 or isinstance(value, bool)
@@ -369,31 +608,68 @@ def _preprocess_pattern(pattern):
                 raise ValueError(
                     Errors.E153.format(vtype=type(value).__name__)
                 )
-            # normalize attributes
-            if attr.islower():
-                del tokens_spec[attr]
-                attr = attr.upper()
-                tokens_spec[attr] = value
-            if attr == "SENT_START":
-                del tokens_spec[attr]
-                attr = "IS_SENT_START"
-                tokens_spec[attr] = value
-            elif attr == "OP":
+            if attr == "OP":
                 continue
             is_extension = attr == "_"
             if is_extension and not isinstance(value, dict):
                 raise ValueError(Errors.E154.format())
             if not is_extension and isinstance(value, dict):
-                for k, v in {**value}.items():
-                    if k.isalpha() and k.isupper():
-                        continue
-                    del value[k]
-                    value[k.upper()] = v
+                for k in [
+                    k for k in value if not (k.isalpha() and k.isupper())
+                ]:
+                    value[k.upper()] = value.pop(k)
+
+
+def _normalize_attr(attr):
+    if not (attr.islower() or attr == "SENT_START"):
+        return attr
+    attr = attr.upper()
+    return "IS_SENT_START" if attr == "SENT_START" else attr
+
+
+@lru_cache(maxsize=4096)
+def _pattern_spec_from_key(pattern_key):
+    # Identical patterns share their compiled spec,
+    # even across matchers, as specs are immutable
+    return _build_pattern_spec(json.loads(pattern_key))
+
+
+def _build_pattern_spec(pattern):
+    pattern_spec = {}
+    num_tokens = len(pattern)
+    for tokens_spec in pattern:
+        for attr, value in tokens_spec.items():
+            if attr == "OP":
+                continue
+            is_extension = attr == "_"
             for a in value.keys() if is_extension else [attr]:
                 pattern_spec.setdefault(a, ([None] * num_tokens, is_extension))
     for i, tokens_spec in enumerate(pattern):
         _align_tokens_spec(pattern_spec, tokens_spec, i)
-    return _finalize_pattern_spec(pattern_spec)
+    final_spec, anchor_gs = _finalize_pattern_spec(pattern_spec)
+    return (final_spec, anchor_gs, _literal_spec(pattern))
+
+
+def _literal_spec(pattern):
+    # Single token patterns made of plain values only
+    # can be matched by value equality, skipping regexes
+    if len(pattern) != 1 or not pattern[0]:
+        return
+    literal_spec = []
+    for attr, value in pattern[0].items():
+        if attr in ("OP", "_", "LENGTH", *_REGEX_PREDICATES) or not (
+            isinstance(value, (str, int))
+        ):
+            return
+        value = str(value)
+        if not value or _XP_WHITESPACE.search(value):
+            return
+        if attr in _CASELESS_ATTRS:
+            if not value.isascii():
+                return
+            value = value.lower()
+        literal_spec.append((attr, value))
+    return tuple(literal_spec)
 
 
 # Quantifiers
@@ -406,8 +682,12 @@ _ZERO_PLUS = "*"
 
 # Regex
 _XP_ONE_TOKEN = r"[^\s]+"
+# No backtracking when a token delimiter must follow
+_XP_ONE_TOKEN_POSSESSIVE = r"[^\s]++"
 _XP_TOKEN_START = r"(?:\s|^)"
 _XP_TOKEN_DELIM = r"(?:\s|^|$)"
+_XP_WHITESPACE = re.compile(r"\s")
+_XP_INNER_WHITESPACE = re.compile(r"[^\S ]")
 
 # Predicates
 _REGEX_PREDICATES = ("REGEX",)
@@ -417,6 +697,9 @@ _COMPARISON_PREDICATES = ("==", "!=", ">=", "<=", ">", "<")
 # Other
 _ANCHOR_QS = (_ONE, _ONE_PLUS)
 
+_PREFERRED_ATTRS = ("LEMMA", "LOWER", "TEXT")
+_CASELESS_ATTRS = ("LENGTH", "LOWER")
+
 
 def _finalize_pattern_spec(spec):
     anchor_gs = set()
@@ -432,12 +715,15 @@ def _finalize_pattern_spec(spec):
         else:
             regex = "".join([_XP_TOKEN_START, *(x[0] for x in xps)])
         flags = re.U | re.M
-        if attr in ("LENGTH", "LOWER"):
+        if attr in _CASELESS_ATTRS:
             flags |= re.I
         final_spec[attr] = (re.compile(regex, flags=flags), is_extension)
-    sort_by = lambda x: x[0] not in ("LEMMA", "LOWER", "TEXT")
-    final_spec = {k: v for k, v in sorted(final_spec.items(), key=sort_by)}
-    return (final_spec, anchor_gs)
+    # most selective attributes come first
+    final_spec = (
+        *((a, v) for a, v in final_spec.items() if a in _PREFERRED_ATTRS),
+        *((a, v) for a, v in final_spec.items() if a not in _PREFERRED_ATTRS),
+    )
+    return (final_spec, tuple(sorted(anchor_gs)))
 
 
 def _align_tokens_spec(spec, tokens_spec, index):
@@ -456,6 +742,8 @@ def _align_tokens_spec(spec, tokens_spec, index):
             if not (_q and _xp):
                 continue
             lazy = _q == _ONE_PLUS and _xp == _XP_ONE_TOKEN
+            if _q != _NONE and _xp == _XP_ONE_TOKEN:
+                _xp = _XP_ONE_TOKEN_POSSESSIVE
             _xp = _re_wrap_quantifier(_q, _xp, lazy)
             if needs_delim:
                 _xp += xp_cond_delim
@@ -521,8 +809,15 @@ def _xp_from_setmember(operator, args):
     if len(args) == 1:
         pipe = re.escape(args[0])
     else:
-        terms = (re.escape(term) for term in args)
-        pipe = "".join([r"(?:", r"|".join(terms), r")"])
+        # repeated terms add nothing to the alternation
+        terms = list(dict.fromkeys(args))
+        if any(_XP_WHITESPACE.search(term) for term in terms):
+            pipe = "".join([r"(?:", r"|".join(map(re.escape, terms)), r")"])
+        else:
+            # A term can't span tokens, so the longest term matching
+            # is the whole token or none: no need to backtrack into it
+            terms.sort(key=len, reverse=True)
+            pipe = "".join([r"(?>", r"|".join(map(re.escape, terms)), r")"])
     return f"(?!{pipe})[^ ]+" if operator == "NOT_IN" else pipe
 
 
@@ -530,13 +825,14 @@ def _xp_from_comparison(operator, length):
     return _re_wrap_length(operator, length)
 
 
+# Prefix and suffix wrapping a token regex
 _WRAP_Q_LOOKUP = {
-    _NONE: "({xp})",
-    _ONE: "({xp})",
-    _ONE_PLUS: "((?:{{xp}}{delim})+)".format(delim=_XP_TOKEN_DELIM),
-    _ZERO: "(?!{xp})([^ ]+)",
-    _ZERO_ONE: "({{xp}}{delim})?".format(delim=_XP_TOKEN_DELIM),
-    _ZERO_PLUS: "((?:{{xp}}{delim})*)".format(delim=_XP_TOKEN_DELIM),
+    _NONE: ("(", ")"),
+    _ONE: ("(", ")"),
+    _ONE_PLUS: ("((?:", f"{_XP_TOKEN_DELIM})+)"),
+    _ZERO: ("(?!", ")([^ ]+)"),
+    _ZERO_ONE: ("(", f"{_XP_TOKEN_DELIM})?"),
+    _ZERO_PLUS: ("((?:", f"{_XP_TOKEN_DELIM})*)"),
 }
 
 
@@ -548,72 +844,74 @@ def _re_wrap_quantifier(q, xp, lazy=False):
     if q not in _WRAP_Q_LOOKUP:
         keys = ", ".join(_WRAP_Q_LOOKUP.keys())
         raise ValueError(Errors.E011.format(op=q, opts=keys))
-    xpq = _WRAP_Q_LOOKUP[q].format(xp=xp)
-    if not lazy:
-        return xpq
-    return "".join([xpq[:-1], "?", xpq[-1:]])
+    prefix, suffix = _WRAP_Q_LOOKUP[q]
+    if lazy:
+        suffix = "".join([suffix[:-1], "?", suffix[-1:]])
+    return prefix + xp + suffix
 
 
 def _re_wrap_length(cmp, l):
     if cmp == "==":
-        return "(?:[^ ]{{{}}}+)".format(l)
+        return "(?>[^ ]{{{}}})".format(l)
     elif cmp == "!=":
-        return "(?:[^ ]{{1,{}}}+|[^ ]{{{},}}+)".format(l - 1, l + 1)
+        return "(?:(?>[^ ]{{1,{}}})|(?>[^ ]{{{},}}))".format(l - 1, l + 1)
     elif cmp == ">=":
-        return "(?:[^ ]{{{},}}+)".format(l)
+        return "(?>[^ ]{{{},}})".format(l)
     elif cmp == "<=":
-        return "(?:[^ ]{{1,{}}}+)".format(l)
+        return "(?>[^ ]{{1,{}}})".format(l)
     elif cmp == ">":
-        return "(?:[^ ]{{{},}}+)".format(l + 1)
+        return "(?>[^ ]{{{},}})".format(l + 1)
     elif cmp == "<":
-        return "(?:[^ ]{{1,{}}}+)".format(l - 1)
+        return "(?>[^ ]{{1,{}}})".format(l - 1)
     else:
         raise ValueError(
             Errors.E126.format(bad=cmp, good=_COMPARISON_PREDICATES)
         )
 
 
-def _get_token_attr(token: Token, attr: str):
-    if attr == "REGEX":
-        return token.text
-    elif attr == "LEMMA":
-        return token.lemma_.lower()
-    elif attr == "NORM":
-        if not token.norm_:
-            return token.lex.norm
-        return token.norm_
-    elif attr == "POS":
-        return token.pos_
-    elif attr == "TAG":
-        return token.tag_
-    elif attr == "DEP":
-        return token.dep_
-    elif attr == "SENT_START":
-        return token.sent_start
-    elif attr == "ENT_TYPE":
-        return token.ent_type_
-    elif attr == "ORTH":
-        return token.orth_
-    elif attr == "TEXT":
-        return token.text
-    elif attr == "LOWER":
-        return token.lower_
-    elif attr == "SHAPE":
-        return token.shape_
-    elif attr == "PREFIX":
-        return token.prefix_
-    elif attr == "SUFFIX":
-        return token.suffix_
+_TOKEN_ATTR_GETTERS = {
+    "REGEX": attrgetter("text"),
+    "LEMMA": lambda token: token.lemma_.lower(),
+    "NORM": lambda token: token.norm_ or token.lex.norm,
+    "POS": attrgetter("pos_"),
+    "TAG": attrgetter("tag_"),
+    "DEP": attrgetter("dep_"),
+    "SENT_START": attrgetter("sent_start"),
+    "ENT_TYPE": attrgetter("ent_type_"),
+    "ORTH": attrgetter("orth_"),
+    "TEXT": attrgetter("text"),
+    "LOWER": attrgetter("lower_"),
+    "SHAPE": attrgetter("shape_"),
+    "PREFIX": attrgetter("prefix_"),
+    "SUFFIX": attrgetter("suffix_"),
     # LENGTH attribute must be checked on text
     # and it cannot live together with
     # another textual attribute, so we set it
     # as LOWER for a performance reason
-    elif attr == "LENGTH":
-        return token.lower_
-    elif attr == "CLUSTER":
-        return token.cluster
-    elif attr == "LANG":
-        return token.lang_
-    elif token.check_flag(intify_attr(attr)):
-        return "True"
-    return "False"
+    "LENGTH": attrgetter("lower_"),
+    "CLUSTER": attrgetter("cluster"),
+    "LANG": attrgetter("lang_"),
+}
+
+
+# Boolean attributes are checked as lexeme flags
+_FLAG_IDS = {
+    attr: intify_attr(attr)
+    for attr, prop in TOKEN_PATTERN_SCHEMA["items"]["properties"].items()
+    if prop.get("$ref") == "#/definitions/boolean_value"
+}
+
+
+def _get_token_attr_getter(attr: str):
+    if attr in _TOKEN_ATTR_GETTERS:
+        return _TOKEN_ATTR_GETTERS[attr]
+    if attr in _FLAG_IDS:
+        flag_id = _FLAG_IDS[attr]
+    else:
+        flag_id = _intify_attr(attr)
+    return lambda token: str(token.check_flag(flag_id))
+
+
+@lru_cache(maxsize=None)
+def _intify_attr(attr: str):
+    return intify_attr(attr)
@@ -236,6 +236,7 @@ def _find_matches_for(
 ) -> Iterable[Tuple[Span, Set[Span]]]:
     form2other = {}
     matches = []
+    added = set()
     global_matcher = Matcher(doc.vocab)
     for (long_candidate, short_candidate) in filtered:
         abbr = find_abbreviation(long_candidate, short_candidate)
@@ -246,13 +247,21 @@ def _find_matches_for(
         # Look for each new abbreviation globally to find lone ones
         for form, other in ((long_form, short_form), (short_form, long_form)):
             form2other.setdefault(form, other)
-            pattern = [{"TEXT": t.text} for t in form]
+            words = tuple(t.text for t in form)
+            # Same forms would add the same rule again
+            if (form.text, words) in added:
+                continue
+            added.add((form.text, words))
+            pattern = [{"TEXT": w} for w in words]
             global_matcher.add(form.text, [pattern])
     seen = set()
+    key2text = {}
     # Search for lone abbreviations globally
     for key, start, end in global_matcher(doc):
         other = None
-        text = doc.vocab.strings[key]
+        if key not in key2text:
+            key2text[key] = doc.vocab.strings[key]
+        text = key2text[key]
         for f, o in form2other.items():
             if f.text != text or f.start > start:
                 continue
@@ -67,14 +67,22 @@ class LabelX:
         Doc
             The doc after labeling.
         """
+        i2labels = {}
+        key2label = {}
         for key, start, end in self._matcher(doc):
-            label = doc.vocab.strings[key]
+            if key not in key2label:
+                key2label[key] = doc.vocab.strings[key]
+            label = key2label[key]
             span = Span(doc, start, end, label)
-            for token in span:
-                if label in token._.labels:
-                    continue
-                token._.labels.append(label)
+            for i in range(start, end):
+                # dict keys work as an ordered set
+                i2labels.setdefault(i, {}).setdefault(label)
             doc._.labelings.append(span)
+        for i, labels in i2labels.items():
+            token_labels = doc[i]._.labels
+            token_labels.extend(
+                label for label in labels if label not in token_labels
+            )
         _sort_labelings(doc)
         if doc.has_extension("abbrs"):
             _merge_abbrs_labelings(doc)
@@ -50,6 +50,7 @@ class WikiGraph:
         self._disambiguations = None
         self._categories = None
         self._category_links = None
+        self._undirected_links = None
         self._wpd = WikiPageDetector()
 
     @staticmethod
@@ -111,7 +112,7 @@ class WikiGraph:
             sources.append(self._redirects.keys())
         if disambi:
             sources.append(self._disambiguations.keys())
-        return (el for el in chain.from_iterable(sources))
+        return chain.from_iterable(sources)
 
     def categories(self):
         return self._categories.keys()
@@ -159,14 +160,18 @@ class WikiGraph:
         ]
 
     def get_neighbors(self, page: str, distance: int = 1):
-        adjacency = self._category_links + self._category_links.T
-        adjacency.tocsr().sort_indices()
+        if self._undirected_links is None:
+            # built once, as it spans the whole graph
+            adjacency = self._category_links + self._category_links.T
+            adjacency = adjacency.tocsr()
+            adjacency.sort_indices()
+            self._undirected_links = adjacency
         return [
             self.get_page(pageid)
             for pageid in _get_neighborhood(
                 self.get_pageid(self.redirect(page)),
                 distance,
-                adjacency,
+                self._undirected_links,
             )
         ]
 
@@ -178,15 +183,24 @@ def _get_neighbors(adjacency, node):
 
 
 def _get_neighborhood(pageid, distance, adjacency):
-    def _recursion_task(pageid, left):
-        left -= 1
-        for neigh in _get_neighbors(adjacency, pageid):
-            yield neigh
-            if not left:
-                continue
-            yield from _recursion_task(neigh, left)
-
-    return list(set(_recursion_task(pageid, distance)))
+    # breadth-first, so that each node is expanded
+    # only once, at the shortest distance it's reached
+    neighborhood = set()
+    expanded = {pageid}
+    frontier = [pageid]
+    for _ in range(distance):
+        next_frontier = []
+        for node in frontier:
+            for neigh in _get_neighbors(adjacency, node).tolist():
+                neighborhood.add(neigh)
+                if neigh in expanded:
+                    continue
+                expanded.add(neigh)
+                next_frontier.append(neigh)
+        if not next_frontier:
+            break
+        frontier = next_frontier
+    return list(neighborhood)
 
 
 _XP_SEPS = re.compile(r"(\p{P})")
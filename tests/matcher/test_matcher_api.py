@@ -1,3 +1,5 @@
+import pickle
+
 import pytest
 from mock import Mock
 from spacy.tokens import Doc, Token
@@ -94,6 +96,21 @@ def test_matcher_match_multi(matcher, en_vocab):
     ]
 
 
+def test_matcher_pipe(matcher, en_vocab):
+    docs = [
+        Doc(en_vocab, words=["I", "like", "java"]),
+        Doc(en_vocab, words=["I", "like", "cheese", "."]),
+    ]
+    assert list(matcher.pipe(docs)) == docs
+    results = list(matcher.pipe(docs, return_matches=True))
+    assert [matches for _, matches in results] == [
+        [(7112935854966758681, 2, 3)],
+        [],
+    ]
+    results = list(matcher.pipe(zip(docs, "ab"), as_tuples=True))
+    assert results == list(zip(docs, "ab"))
+
+
 def test_matcher_empty_dict(en_vocab):
     """Test matcher allows empty token specs, meaning match on any token."""
     matcher = Matcher(en_vocab)
@@ -409,3 +426,45 @@ def test_matcher_callback(en_vocab):
     doc = Doc(en_vocab, words=["This", "is", "a", "test", "."])
     matches = matcher(doc)
     mock.assert_called_once_with(matcher, doc, 0, matches)
+
+
+def test_matcher_doc_changes(en_vocab):
+    matcher = Matcher(en_vocab)
+    matcher.add("Rule", [[{"POS": "NOUN"}, {"LOWER": "test"}]])
+    words = ["a", "unit", "test"]
+    doc = Doc(en_vocab, words=words, pos=["DET", "ADJ", "NOUN"])
+    assert matcher(doc) == []
+    doc[1].pos_ = "NOUN"
+    assert len(matcher(doc)) == 1
+    with doc.retokenize() as retokenizer:
+        retokenizer.merge(doc[0:2])
+    assert matcher(doc) == []
+
+
+def test_matcher_pickle(matcher, en_vocab):
+    doc = Doc(en_vocab, words=["I", "like", "Google", "Now", "and", "java"])
+    matches = matcher(doc)
+    new_matcher = pickle.loads(pickle.dumps(matcher))
+    assert new_matcher(doc) == matches
+    assert pickle.loads(pickle.dumps(Matcher(en_vocab))) is not None
+
+
+def test_matcher_array_attrs(en_vocab):
+    matcher = Matcher(en_vocab)
+    matcher.add("TAG", [[{"TAG": "NN"}, {"LOWER": "runs"}]])
+    matcher.add("LEMMA", [[{"LEMMA": "run"}, {"DEP": "prep"}]])
+    matcher.add("SHAPE", [[{"SHAPE": "Xxxxx"}, {"ORTH": "runs"}]])
+    words = ["Alice", "runs", "up", "hills"]
+    doc = Doc(
+        en_vocab,
+        words=words,
+        tags=["NNP", "VBZ", "RP", "NNS"],
+        lemmas=["Alice", "RUN", "up", "hill"],
+        deps=["nsubj", "ROOT", "prep", "pobj"],
+    )
+    matches = matcher(doc)
+    assert [m[1:] for m in matches] == [(1, 3), (0, 2)]
+    # spans read attributes token by token
+    assert matcher(doc[:], allow_missing=True) == matches
+    doc[0].tag_ = "NN"
+    assert len(matcher(doc)) == 3
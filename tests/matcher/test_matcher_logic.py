@@ -252,3 +252,138 @@ def test_matching_not_regex_escaping(matcher):
     matcher.add("TEST_ESCAPE", [pattern])
     matches = matcher(Doc(matcher.vocab, words=["[1]", "(2)"]))
     assert len(matches) == 1
+
+
+def test_matching_empty_trailing_values(en_vocab):
+    # an offset past the last non-empty value snaps to the
+    # end of that token, not to the end of the doc
+    matcher = Matcher(en_vocab)
+    matcher.add("PERSON", [[{"ENT_TYPE": "PERSON", "OP": "?"}]])
+    doc = Doc(en_vocab, words=["Alice", "met"], ents=["B-PERSON", "O"])
+    assert [m[1:] for m in matcher(doc)] == [(0, 1)]
+
+
+def test_matching_regex_non_ascii_tag(matcher, en_vocab):
+    pattern = [{"TAG": {"REGEX": r"^\w+-固有\w+$"}}]
+    matcher.add("TEST_TAG", [pattern])
+    doc = Doc(
+        en_vocab, words=["東京", "です"], tags=["名詞-固有名詞", "助動詞"]
+    )
+    assert [m[1:] for m in matcher(doc)] == [(0, 1)]
+
+
+def _literal_and_regex_matches(vocab, doc, token_spec):
+    # an explicit operator keeps the pattern off the literal path
+    literal = Matcher(vocab)
+    literal.add("TEST", [[token_spec]])
+    regex = Matcher(vocab)
+    regex.add("TEST", [[{**token_spec, "OP": "1"}]])
+    return literal(doc), regex(doc)
+
+
+@pytest.mark.parametrize(
+    "words,token_spec,spans",
+    [
+        # non-ASCII lowercase char matching ASCII ignoring case
+        (["ſ", "s", "S"], {"LOWER": "s"}, [(0, 1), (1, 2), (2, 3)]),
+        # non-ASCII caseless value
+        (["É", "e", "é"], {"LOWER": "é"}, [(0, 1), (2, 3)]),
+        # whitespace token values
+        (["a", "\n", "b", "\n"], {"LOWER": "b"}, [(2, 3)]),
+        # whitespace value
+        (["a", "\n", "b"], {"ORTH": "\n"}, [(1, 2)]),
+        # empty doc
+        ([], {"LOWER": "a"}, []),
+    ],
+)
+def test_matching_literal_fallbacks(en_vocab, words, token_spec, spans):
+    doc = Doc(en_vocab, words=words)
+    literal, regex = _literal_and_regex_matches(en_vocab, doc, token_spec)
+    assert literal == regex
+    assert [m[1:] for m in literal] == spans
+
+
+def test_matching_literal_multi_attrs(en_vocab):
+    words = ["Apple", "apple", "apples", "apple"]
+    doc = Doc(en_vocab, words=words, pos=["PROPN", "NOUN", "NOUN", "VERB"])
+    token_spec = {"LOWER": "apple", "POS": "NOUN"}
+    literal, regex = _literal_and_regex_matches(en_vocab, doc, token_spec)
+    assert literal == regex
+    assert [m[1:] for m in literal] == [(1, 2)]
+
+
+def test_matching_lowercase_attrs(en_vocab):
+    words = ["ba", "x", "ab"]
+    doc = Doc(en_vocab, words=words, pos=["VERB", "PUNCT", "VERB"])
+    matches = []
+    for attr in ("POS", "pos"):
+        matcher = Matcher(en_vocab)
+        pattern = [{attr: "VERB", "ORTH": "x", "OP": "*"}, {"POS": "PUNCT"}]
+        matcher.add("TEST", [pattern])
+        matches.append([m[1:] for m in matcher(doc)])
+    assert matches[0] == matches[1] == [(1, 2)]
+
+
+@pytest.mark.parametrize(
+    "words,pattern,spans",
+    [
+        # terms prefix of each other
+        (
+            ["ab", "abc", "abcd", "x"],
+            [{"LOWER": {"IN": ["ab", "abc"]}}],
+            [(0, 1), (1, 2)],
+        ),
+        # continuation after the set token
+        (
+            ["abc", "d", "ab", "d", "ab", "c"],
+            [{"LOWER": {"IN": ["ab", "abc"]}}, {"LOWER": "d"}],
+            [(0, 2), (2, 4)],
+        ),
+        # quantified set token
+        (
+            ["ab", "ab", "abc", "d"],
+            [{"LOWER": {"IN": ["ab", "abc"]}, "OP": "+"}, {"LOWER": "d"}],
+            [(0, 4)],
+        ),
+    ],
+)
+def test_matching_in_prefix_terms(en_vocab, words, pattern, spans):
+    matcher = Matcher(en_vocab)
+    matcher.add("TEST", [pattern])
+    doc = Doc(en_vocab, words=words)
+    assert [m[1:] for m in matcher(doc)] == spans
+
+
+@pytest.mark.parametrize(
+    "pattern,spans",
+    [
+        ([{"ORTH": "a"}, {}, {"ORTH": "c", "OP": "?"}], [(0, 3)]),
+        ([{"OP": "+"}, {"ORTH": "c"}], [(0, 3)]),
+        ([{"ORTH": "a", "OP": "*"}, {}, {"ORTH": "d"}], [(2, 4)]),
+        ([{}, {"OP": "*"}, {"ORTH": "d"}], [(0, 4)]),
+    ],
+)
+def test_matching_wildcard_next_to_operators(en_vocab, pattern, spans):
+    matcher = Matcher(en_vocab)
+    matcher.add("TEST", [pattern])
+    doc = Doc(en_vocab, words=["a", "b", "c", "d"])
+    assert [m[1:] for m in matcher(doc)] == spans
+
+
+@pytest.mark.parametrize(
+    "pattern,spans",
+    [
+        ([{"LENGTH": {"==": 2}}], [(1, 2)]),
+        ([{"LENGTH": {"!=": 2}}], [(0, 1), (2, 3), (3, 4)]),
+        ([{"LENGTH": {">=": 2}}], [(1, 2), (2, 3), (3, 4)]),
+        ([{"LENGTH": {"<=": 2}}], [(0, 1), (1, 2)]),
+        ([{"LENGTH": {">": 2}}], [(2, 3), (3, 4)]),
+        ([{"LENGTH": {"<": 2}}], [(0, 1)]),
+        ([{"LENGTH": {"!=": 2}}, {"LENGTH": {">=": 3}}], [(2, 4)]),
+    ],
+)
+def test_matching_length(en_vocab, pattern, spans):
+    matcher = Matcher(en_vocab)
+    matcher.add("TEST", [pattern])
+    doc = Doc(en_vocab, words=["a", "bb", "ccc", "dddd"])
+    assert [m[1:] for m in matcher(doc)] == spans
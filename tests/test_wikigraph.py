@@ -1,3 +1,11 @@
+import pytest
+
+from spikex.wikigraph.wikigraph import (
+    _edgelist2adjacency,
+    _get_neighborhood,
+)
+
+
 def test_categories(wikigraph):
     categories = wikigraph.get_categories("Category:Apples")
     assert categories == ["Category:Fruits", "Category:Amygdaloideae"]
@@ -25,3 +33,27 @@ def test_neighbors(wikigraph):
         "Winesap",
         "Honeycrisp",
     ]
+
+
+@pytest.fixture
+def adjacency():
+    # 0 -> 1 -> 2 -> 0 cycle, plus 2 -> 3 and 4 alone
+    edges = [(0, 1), (1, 2), (2, 0), (2, 3)]
+    return _edgelist2adjacency(edges + [(4, 4)])
+
+
+@pytest.mark.parametrize(
+    "pageid,distance,neighborhood",
+    [
+        (0, 0, set()),
+        (0, 1, {1}),
+        (0, 2, {1, 2}),
+        # the cycle leads back to the start
+        (0, 3, {0, 1, 2, 3}),
+        (1, 2, {0, 2, 3}),
+        (3, 2, set()),
+        (4, 2, {4}),
+    ],
+)
+def test_get_neighborhood(adjacency, pageid, distance, neighborhood):
+    assert set(_get_neighborhood(pageid, distance, adjacency)) == neighborhood